@@ -0,0 +1,37 @@
+from aiohttp import web
+
+from app.leaderboard import leaderboard
+
+ETAG_ANY = "*"
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    return any(tag.value in (etag, ETAG_ANY) for tag in request.if_none_match or ())
+
+
+async def get_leaderboard(request: web.Request) -> web.Response:
+    rating_id = int(request.match_info["rating_id"])
+    snapshot = leaderboard.get(rating_id)
+    if snapshot is None:
+        raise web.HTTPNotFound()
+    etag, body = snapshot
+    if etag_matches(request, etag):
+        response = web.Response(status=304)
+    else:
+        response = web.Response(body=body, content_type="application/json")
+    response.etag = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get(r"/ratings/{rating_id:\d+}/leaderboard", get_leaderboard)
+    return app
+
+
+async def start_api(port: int) -> web.AppRunner:
+    runner = web.AppRunner(create_app())
+    await runner.setup()
+    await web.TCPSite(runner, port=port).start()
+    return runner
@@ -1,22 +1,51 @@
+import gzip
 import logging
+import os
+import tempfile
 from aiogram import F, Bot, Dispatcher
 from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.types import CallbackQuery
+from aiogram.types import CallbackQuery, FSInputFile
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from app.api import start_api
+from app.callbacks import *
+from app.export import write_rating_export
 from app.filters import UserIDFilter
+from app.profiling import ProfilerMiddleware
 from app.session import init_db
+from app.sparkline import sparkline
 from app.usecase import *
 from app.keyboards import *
 
-token = ""
+token = os.getenv("BOT_TOKEN", "")
+api_port = os.getenv("LEADERBOARD_API_PORT")
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+profile_dir = os.getenv("PROFILE_DIR", "profiles")
+profile_sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+profile_handlers = set(filter(None, os.getenv("PROFILE_HANDLERS", "").split(",")))
+profile_user_ids = {
+    int(user_id)
+    for user_id in filter(None, os.getenv("PROFILE_USER_IDS", "").split(","))
+}
 logging.basicConfig(level=logging.INFO)
 bot = Bot(token)
 storage = MemoryStorage()
 dp = Dispatcher(storage=storage)
+callbacks = CallbackTable()
+
+if profile_sample_rate or profile_handlers or profile_user_ids:
+    profiler = ProfilerMiddleware(
+        profile_dir,
+        callbacks,
+        sample_rate=profile_sample_rate,
+        handlers=profile_handlers,
+        user_ids=profile_user_ids,
+    )
+    dp.message.middleware(profiler)
+    dp.callback_query.middleware(profiler)
 
 
 class RatingStates(StatesGroup):
@@ -52,7 +81,7 @@ async def cmd_kpi(message: Message, state: FSMContext):
     await message.answer(f"All metrics:\n{metrics_str}")
 
 
-@dp.callback_query(F.data == "create_rating")
+@callbacks.route(CreateRating)
 async def create_rating(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RatingStates.new_rating)
     await callback.message.edit_text(
@@ -79,7 +108,7 @@ async def receive_new_rating_name(message: Message, state: FSMContext):
     await state.set_state(RatingStates.rating_menu)
 
 
-@dp.callback_query(F.data == "load_rating")
+@callbacks.route(LoadRating)
 async def load_rating(callback: CallbackQuery, state: FSMContext):
     ratings = get_user_ratings(callback.from_user.id)
     if not ratings:
@@ -96,7 +125,7 @@ async def load_rating(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data == "delete_rating")
+@callbacks.route(DeleteRating)
 async def delete_rating(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     rating_id = data.get("rating_id")
@@ -111,9 +140,11 @@ async def delete_rating(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data.startswith("select_rating_"))
-async def select_rating(callback: CallbackQuery, state: FSMContext):
-    rating_id = int(callback.data.split("_")[-1])
+@callbacks.route(SelectRating)
+async def select_rating(
+    callback: CallbackQuery, state: FSMContext, callback_data: SelectRating
+):
+    rating_id = callback_data.rating_id
     await state.update_data(rating_id=rating_id)
     rating = get_rating_by_id(rating_id)
     if isinstance(rating, Exception):
@@ -129,7 +160,7 @@ async def select_rating(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RatingStates.rating_menu)
 
 
-@dp.callback_query(F.data == "add_participant")
+@callbacks.route(AddParticipant)
 async def add_participant(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RatingStates.add_participant)
     await callback.message.edit_text(
@@ -159,11 +190,13 @@ async def receive_participant_name(message: Message, state: FSMContext):
     await state.set_state(RatingStates.rating_menu)
 
 
-@dp.callback_query(F.data.startswith("show_participant_statistics_"))
-async def show_participant_statistics(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(ShowParticipant)
+async def show_participant_statistics(
+    callback: CallbackQuery, state: FSMContext, callback_data: ShowParticipant
+):
     data = await state.get_data()
     rating_id = data.get("rating_id")
-    participant_id = int(callback.data.split("_")[-1])
+    participant_id = callback_data.participant_id
     await state.update_data(participant_id=participant_id)
     stats = get_participant_statistics(participant_id)
     if isinstance(stats, Exception):
@@ -173,6 +206,7 @@ async def show_participant_statistics(callback: CallbackQuery, state: FSMContext
         )
         return
 
+    history = get_participant_rating_history(participant_id)
     formatted_stats = f"""
 Player: {stats.player.name}
 Rating: {stats.rating_value}
@@ -180,6 +214,7 @@ Total games: {stats.played_games}
 Total wins: {stats.wins}
 Total losses: {stats.losses}
 Win Rate: {stats.win_rate * 100:.2f}%
+Trend: {sparkline(history) if len(history) > 1 else "N/A"}
     """
 
     await callback.message.edit_text(
@@ -188,7 +223,7 @@ Win Rate: {stats.win_rate * 100:.2f}%
     )
 
 
-@dp.callback_query(F.data == "delete_participant")
+@callbacks.route(DeleteParticipant)
 async def delete_participant(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     rating_id = data.get("rating_id")
@@ -207,7 +242,32 @@ async def delete_participant(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data == "add_game")
+@callbacks.route(ExportRating)
+async def export_rating(
+    callback: CallbackQuery, state: FSMContext, callback_data: ExportRating
+):
+    data = await state.get_data()
+    rating_id = data.get("rating_id")
+    filename = f"rating_{rating_id}.{callback_data.fmt.value}.gz"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, filename)
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as file:
+            exc = await write_rating_export(rating_id, callback_data.fmt, file)
+        if isinstance(exc, Exception):
+            await callback.message.edit_text(
+                "Rating not found. Select options:", reply_markup=start_keyboard()
+            )
+            return
+        if os.path.getsize(path) > MAX_DOCUMENT_SIZE:
+            await callback.answer(
+                "The export is larger than Telegram's 50 MB limit for bots.",
+                show_alert=True,
+            )
+            return
+        await callback.message.answer_document(FSInputFile(path))
+
+
+@callbacks.route(AddGame)
 async def add_game(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     rating_id = data.get("rating_id")
@@ -228,11 +288,13 @@ async def add_game(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data.startswith("select_player_"))
-async def select_player(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(SelectPlayer)
+async def select_player(
+    callback: CallbackQuery, state: FSMContext, callback_data: SelectPlayer
+):
     data = await state.get_data()
     game_participant_selection = data.get("game_participant_selection")
-    player_id = int(callback.data.split("_")[-1])
+    player_id = callback_data.player_id
 
     game_participant_selection[player_id] = not game_participant_selection[player_id]
 
@@ -243,7 +305,7 @@ async def select_player(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data == "start_ranking")
+@callbacks.route(StartRanking)
 async def start_ranking(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     game_participant_selection = data.get("game_participant_selection")
@@ -268,10 +330,12 @@ async def start_ranking(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data.startswith("rank_"))
-async def rank_game_participant(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(RankParticipant)
+async def rank_game_participant(
+    callback: CallbackQuery, state: FSMContext, callback_data: RankParticipant
+):
     data = await state.get_data()
-    game_participant_id = int(callback.data.split("_")[-1])
+    game_participant_id = callback_data.participant_id
     participant_leaderboard = data.get("participant_leaderboard")
 
     await callback.message.edit_text(
@@ -282,11 +346,13 @@ async def rank_game_participant(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data.startswith("assign_rank_"))
-async def assign_rank(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(AssignRank)
+async def assign_rank(
+    callback: CallbackQuery, state: FSMContext, callback_data: AssignRank
+):
     data = await state.get_data()
-    game_participant_id = int(callback.data.split("_")[-2])
-    rank = int(callback.data.split("_")[-1])
+    game_participant_id = callback_data.participant_id
+    rank = callback_data.rank
     participant_leaderboard = data.get("participant_leaderboard")
     participant_leaderboard[game_participant_id] = rank
     await state.update_data(participant_leaderboard=participant_leaderboard)
@@ -296,7 +362,7 @@ async def assign_rank(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data == "finish_ranking")
+@callbacks.route(FinishRanking)
 async def finish_ranking(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     rating_id = data.get("rating_id")
@@ -315,7 +381,7 @@ async def finish_ranking(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RatingStates.rating_menu)
 
 
-@dp.callback_query(F.data == "return_to_start")
+@callbacks.route(ReturnToStart)
 async def return_to_start(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RatingStates.start)
     await callback.message.edit_text(
@@ -327,7 +393,7 @@ async def return_to_start(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@dp.callback_query(F.data == "return_to_rating_menu")
+@callbacks.route(ReturnToRatingMenu)
 async def return_to_rating_menu(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     rating_id = data.get("rating_id")
@@ -337,6 +403,18 @@ async def return_to_rating_menu(callback: CallbackQuery, state: FSMContext):
     )
 
 
+@dp.callback_query()
+async def route_callback(callback: CallbackQuery, state: FSMContext):
+    await callbacks.dispatch(callback, state)
+
+
+async def run_api():
+    runner = await start_api(int(api_port))
+    dp.shutdown.register(runner.cleanup)
+
+
 if __name__ == "__main__":
     init_db()
+    if api_port:
+        dp.startup.register(run_api)
     dp.run_polling(bot, skip_updates=True)
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Dict-like cache that evicts the least recently used entry past maxsize."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self.items.pop(key, None)
+
+    def clear(self) -> None:
+        self.items.clear()
@@ -0,0 +1,116 @@
+from enum import Enum
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+
+SEPARATOR = ":"
+OUTDATED_MENU = "This menu is out of date, please open it again."
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    jsonl = "jsonl"
+
+
+class LoadRating(CallbackData, prefix="lr"):
+    pass
+
+
+class CreateRating(CallbackData, prefix="cr"):
+    pass
+
+
+class DeleteRating(CallbackData, prefix="dr"):
+    pass
+
+
+class SelectRating(CallbackData, prefix="sr"):
+    rating_id: int
+
+
+class AddParticipant(CallbackData, prefix="ap"):
+    pass
+
+
+class ShowParticipant(CallbackData, prefix="sp"):
+    participant_id: int
+
+
+class DeleteParticipant(CallbackData, prefix="dp"):
+    pass
+
+
+class AddGame(CallbackData, prefix="ag"):
+    pass
+
+
+class SelectPlayer(CallbackData, prefix="pl"):
+    player_id: int
+
+
+class StartRanking(CallbackData, prefix="st"):
+    pass
+
+
+class RankParticipant(CallbackData, prefix="rk"):
+    participant_id: int
+
+
+class AssignRank(CallbackData, prefix="ar"):
+    participant_id: int
+    rank: int
+
+
+class FinishRanking(CallbackData, prefix="fr"):
+    pass
+
+
+class ExportRating(CallbackData, prefix="ex"):
+    fmt: ExportFormat
+
+
+class ReturnToStart(CallbackData, prefix="rs"):
+    pass
+
+
+class ReturnToRatingMenu(CallbackData, prefix="rm"):
+    pass
+
+
+class CallbackTable:
+    """Routes callback queries by their action prefix with one dict lookup."""
+
+    def __init__(self):
+        self.routes = {}
+
+    def route(self, factory: type[CallbackData]):
+        if factory.__separator__ != SEPARATOR:
+            raise ValueError(f"{factory.__name__} must use {SEPARATOR!r} separator")
+        if factory.__prefix__ in self.routes:
+            raise ValueError(f"callback prefix {factory.__prefix__!r} already routed")
+
+        def decorator(handler):
+            self.routes[factory.__prefix__] = (factory, handler)
+            return handler
+
+        return decorator
+
+    def lookup(self, data: str):
+        return self.routes.get(data.partition(SEPARATOR)[0])
+
+    async def dispatch(self, callback: CallbackQuery, state: FSMContext):
+        data = callback.data or ""
+        route = self.lookup(data)
+        if route is None:
+            # Buttons from keyboards sent before a format change.
+            return await callback.answer(OUTDATED_MENU)
+        factory, handler = route
+        if not factory.model_fields:
+            return await handler(callback, state)
+        try:
+            callback_data = factory.unpack(data)
+        except (TypeError, ValueError):
+            # TypeError: the payload has a different number of fields.
+            return await callback.answer(OUTDATED_MENU)
+        return await handler(callback, state, callback_data)
@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import json
+from itertools import islice
+from typing import IO, Iterator
+
+from sqlalchemy import Connection, and_, select
+
+from app.callbacks import ExportFormat
+from app.model import (
+    Game,
+    Player,
+    PlayerStatistics,
+    Rating,
+    RatingHistory,
+    game_participant_association,
+)
+from app.session import engine
+
+BATCH_SIZE = 1000
+FIELDS = [
+    "type",
+    "player_id",
+    "name",
+    "rating",
+    "played_games",
+    "wins",
+    "game_id",
+    "rating_after",
+    "played_at",
+]
+
+
+def iter_rating_rows(connection: Connection, rating_id: int) -> Iterator[dict]:
+    """Yield a rating's players, then every game participation in game order.
+
+    Rows are fetched in batches of plain tuples, so the result set never grows
+    with the size of the rating.
+    """
+    connection = connection.execution_options(yield_per=BATCH_SIZE)
+    players = (
+        select(
+            Player.id,
+            Player.name,
+            PlayerStatistics.rating_value,
+            PlayerStatistics.played_games,
+            PlayerStatistics.wins,
+        )
+        .join(Player.statistics)
+        .where(Player.rating_id == rating_id)
+        .order_by(Player.name)
+    )
+    for player_id, name, rating, played_games, wins in connection.execute(players):
+        yield {
+            "type": "player",
+            "player_id": player_id,
+            "name": name,
+            "rating": rating,
+            "played_games": played_games,
+            "wins": wins,
+        }
+
+    participants = game_participant_association.c
+    results = (
+        select(
+            participants.game_id,
+            participants.player_id,
+            RatingHistory.rating_value,
+            RatingHistory.created_at,
+        )
+        .select_from(Game)
+        .join(game_participant_association, participants.game_id == Game.id)
+        .outerjoin(
+            RatingHistory,
+            and_(
+                RatingHistory.player_id == participants.player_id,
+                RatingHistory.game_id == participants.game_id,
+            ),
+        )
+        .where(Game.rating_id == rating_id)
+        .order_by(Game.id)
+    )
+    for game_id, player_id, rating_after, played_at in connection.execute(results):
+        yield {
+            "type": "game",
+            "game_id": game_id,
+            "player_id": player_id,
+            "rating_after": rating_after,
+            "played_at": played_at.isoformat() if played_at else None,
+        }
+
+
+class JSONLWriter:
+    def __init__(self, file: IO[str]):
+        self.file = file
+
+    def writerows(self, rows: list[dict]) -> None:
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False))
+            self.file.write("\n")
+
+
+def csv_writer(file: IO[str]) -> csv.DictWriter:
+    writer = csv.DictWriter(file, fieldnames=FIELDS)
+    writer.writeheader()
+    return writer
+
+
+WRITERS = {ExportFormat.jsonl: JSONLWriter, ExportFormat.csv: csv_writer}
+
+
+async def write_rating_export(
+    rating_id: int, fmt: ExportFormat, file: IO[str]
+) -> None | Exception:
+    """Stream a rating into ``file``, yielding to the event loop per batch.
+
+    The export reads through its own connection so handlers that commit on
+    the shared session while it is suspended cannot close its cursor.
+    """
+    with engine.connect() as connection:
+        exists = connection.scalar(select(Rating.id).where(Rating.id == rating_id))
+        if exists is None:
+            return Exception("rating not found")
+        writer = WRITERS[fmt](file)
+        rows = iter_rating_rows(connection, rating_id)
+        while batch := list(islice(rows, BATCH_SIZE)):
+            writer.writerows(batch)
+            await asyncio.sleep(0)
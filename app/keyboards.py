@@ -1,5 +1,6 @@
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 
+from app.callbacks import *
 from app.usecase import get_participant_by_id, get_rating_participants
 
 CHECK_MARK = "✅"
@@ -8,7 +9,7 @@ CROSS_MARK = "❌"
 
 def start_keyboard():
     keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="Rating", callback_data="load_rating")
+    keyboard.button(text="Rating", callback_data=LoadRating().pack())
     return keyboard.as_markup()
 
 
@@ -19,16 +20,24 @@ def rating_menu_keyboard(rating_id):
         keyboard.row(
             InlineKeyboardButton(
                 text=participant.name,
-                callback_data=f"show_participant_statistics_{participant.id}",
+                callback_data=ShowParticipant(participant_id=participant.id).pack(),
             ),
             width=1,
         )
 
     keyboard.row(
-        InlineKeyboardButton(text="New Participant", callback_data="add_participant"),
-        InlineKeyboardButton(text="New Game", callback_data="add_game"),
-        InlineKeyboardButton(text="Delete Rating", callback_data="delete_rating"),
-        InlineKeyboardButton(text="Start Menu", callback_data="return_to_start"),
+        InlineKeyboardButton(
+            text="New Participant", callback_data=AddParticipant().pack()
+        ),
+        InlineKeyboardButton(text="New Game", callback_data=AddGame().pack()),
+        InlineKeyboardButton(text="Delete Rating", callback_data=DeleteRating().pack()),
+        InlineKeyboardButton(
+            text="Export CSV", callback_data=ExportRating(fmt="csv").pack()
+        ),
+        InlineKeyboardButton(
+            text="Export JSONL", callback_data=ExportRating(fmt="jsonl").pack()
+        ),
+        InlineKeyboardButton(text="Start Menu", callback_data=ReturnToStart().pack()),
         width=2,
     )
 
@@ -37,21 +46,23 @@ def rating_menu_keyboard(rating_id):
 
 def return_to_start_keyboard():
     keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="Return to Start", callback_data="return_to_start")
+    keyboard.button(text="Return to Start", callback_data=ReturnToStart().pack())
     return keyboard.as_markup()
 
 
 def return_to_rating_menu_keyboard():
     keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="Menu", callback_data="return_to_rating_menu")
+    keyboard.button(text="Menu", callback_data=ReturnToRatingMenu().pack())
     return keyboard.as_markup()
 
 
 def player_profile_keyboard():
     keyboard = InlineKeyboardBuilder()
     keyboard.row(
-        InlineKeyboardButton(text="Delete Player", callback_data="delete_participant"),
-        InlineKeyboardButton(text="Back", callback_data="return_to_rating_menu"),
+        InlineKeyboardButton(
+            text="Delete Player", callback_data=DeleteParticipant().pack()
+        ),
+        InlineKeyboardButton(text="Back", callback_data=ReturnToRatingMenu().pack()),
         width=1,
     )
     return keyboard.as_markup()
@@ -64,16 +75,16 @@ def select_players_keyboard(game_participant_selection):
         keyboard.row(
             InlineKeyboardButton(
                 text=f"{CHECK_MARK if selected else CROSS_MARK}    {participant.name}",
-                callback_data=f"select_player_{participant.id}",
+                callback_data=SelectPlayer(player_id=participant.id).pack(),
             ),
             width=1,
         )
     keyboard.row(
-        InlineKeyboardButton(text="Start Ranking", callback_data="start_ranking"),
+        InlineKeyboardButton(text="Start Ranking", callback_data=StartRanking().pack()),
         width=1,
     )
     keyboard.row(
-        InlineKeyboardButton(text="Menu", callback_data="return_to_rating_menu"),
+        InlineKeyboardButton(text="Menu", callback_data=ReturnToRatingMenu().pack()),
         width=1,
     )
     return keyboard.as_markup()
@@ -81,7 +92,7 @@ def select_players_keyboard(game_participant_selection):
 
 def create_new_rating_keyboard():
     keyboard = InlineKeyboardBuilder()
-    keyboard.button(text="Create Rating", callback_data="create_rating")
+    keyboard.button(text="Create Rating", callback_data=CreateRating().pack())
     return keyboard.as_markup()
 
 
@@ -96,17 +107,18 @@ def assign_rank_keyboard(participant_leaderboard):
         keyboard.row(
             InlineKeyboardButton(
                 text=f"{participant.name} — {rank_to_emoji(rank) if rank is not None else 'N/A'}",
-                callback_data=f"rank_{participant_id}",
+                callback_data=RankParticipant(participant_id=participant_id).pack(),
             ),
             width=1,
         )
 
     if all(value is not None for value in participant_leaderboard.values()):
         keyboard.row(
-            InlineKeyboardButton(text="Finish", callback_data="finish_ranking"), width=1
+            InlineKeyboardButton(text="Finish", callback_data=FinishRanking().pack()),
+            width=1,
         )
     keyboard.row(
-        InlineKeyboardButton(text="Menu", callback_data="return_to_rating_menu"),
+        InlineKeyboardButton(text="Menu", callback_data=ReturnToRatingMenu().pack()),
         width=1,
     )
     return keyboard.as_markup()
@@ -117,13 +129,17 @@ def load_rating_keyboard(ratings):
     for rating in ratings:
         keyboard.row(
             InlineKeyboardButton(
-                text=rating.name, callback_data=f"select_rating_{rating.id}"
+                text=rating.name, callback_data=SelectRating(rating_id=rating.id).pack()
             ),
             width=1,
         )
     keyboard.row(
-        InlineKeyboardButton(text="Return to Start", callback_data="return_to_start"),
-        InlineKeyboardButton(text="Create New Rating", callback_data="create_rating"),
+        InlineKeyboardButton(
+            text="Return to Start", callback_data=ReturnToStart().pack()
+        ),
+        InlineKeyboardButton(
+            text="Create New Rating", callback_data=CreateRating().pack()
+        ),
         width=1,
     )
     return keyboard.as_markup()
@@ -137,7 +153,9 @@ def rank_game_participant_keyboard(
         keyboard.row(
             InlineKeyboardButton(
                 text=str(rank_to_emoji(i)),
-                callback_data=f"assign_rank_{game_participant_id}_{i}",
+                callback_data=AssignRank(
+                    participant_id=game_participant_id, rank=i
+                ).pack(),
             ),
             width=1,
         )
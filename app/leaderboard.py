@@ -0,0 +1,63 @@
+import hashlib
+import json
+
+from app.model import Player, PlayerStatistics, Rating
+from app.session import db
+
+
+class LeaderboardSnapshot:
+    """In-memory standings per rating, tagged for conditional requests.
+
+    Ratings are loaded on first read and rebuilt after every write that
+    touches them, so serving a known rating never queries the database.
+    Unknown ratings are never stored.
+    """
+
+    def __init__(self):
+        self.ratings: dict[int, tuple[str, bytes]] = {}
+
+    def get(self, rating_id: int) -> tuple[str, bytes] | None:
+        if rating_id not in self.ratings:
+            self.refresh(rating_id, force=True)
+        return self.ratings.get(rating_id)
+
+    def refresh(self, rating_id: int, force: bool = False) -> None:
+        if not force and rating_id not in self.ratings:
+            return
+        body = build_leaderboard(rating_id)
+        if body is None:
+            self.discard(rating_id)
+            return
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.ratings[rating_id] = (etag, body)
+
+    def discard(self, rating_id: int) -> None:
+        self.ratings.pop(rating_id, None)
+
+
+def build_leaderboard(rating_id: int) -> bytes | None:
+    if db.get(Rating, rating_id) is None:
+        return None
+    rows = (
+        db.query(Player.id, Player.name, PlayerStatistics)
+        .join(Player.statistics)
+        .filter(Player.rating_id == rating_id)
+        .order_by(PlayerStatistics.rating_value.desc())
+        .all()
+    )
+    players = [
+        {
+            "id": player_id,
+            "name": name,
+            "rating": stats.rating_value,
+            "played_games": stats.played_games,
+            "wins": stats.wins,
+            "losses": stats.losses,
+            "win_rate": stats.win_rate,
+        }
+        for player_id, name, stats in rows
+    ]
+    return json.dumps({"rating_id": rating_id, "players": players}).encode()
+
+
+leaderboard = LeaderboardSnapshot()
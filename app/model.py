@@ -1,11 +1,14 @@
 from sqlalchemy import (
     Column,
+    DateTime,
     Integer,
     String,
     Float,
     ForeignKey,
+    Index,
     Table,
     UniqueConstraint,
+    func,
 )
 from sqlalchemy.orm import relationship
 from app.session import ORMModel
@@ -13,7 +16,7 @@ from app.session import ORMModel
 game_participant_association = Table(
     "game_participant_association",
     ORMModel.metadata,
-    Column("game_id", Integer, ForeignKey("games.id")),
+    Column("game_id", Integer, ForeignKey("games.id"), index=True),
     Column("player_id", Integer, ForeignKey("players.id")),
 )
 
@@ -86,8 +89,20 @@ class PlayerStatistics(ORMModel):
 class Game(ORMModel):
     __tablename__ = "games"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    rating_id = Column(Integer, ForeignKey("ratings.id"), nullable=False)
+    rating_id = Column(Integer, ForeignKey("ratings.id"), nullable=False, index=True)
     rating = relationship("Rating", back_populates="games")
     participants = relationship(
         "Player", secondary=game_participant_association, back_populates="games"
     )
+
+
+class RatingHistory(ORMModel):
+    __tablename__ = "rating_history"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
+    player = relationship("Player")
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    game = relationship("Game")
+    rating_value = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    __table_args__ = (Index("ix_rating_history_player_game", "player_id", "game_id"),)
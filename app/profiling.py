@@ -0,0 +1,172 @@
+import cProfile
+import logging
+import random
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+from sqlalchemy import event
+
+from app.callbacks import CallbackTable
+from app.session import engine
+
+logger = logging.getLogger(__name__)
+
+TARGETED = "targeted"
+SAMPLED = "sampled"
+
+current_query_counter: ContextVar["QueryCounter | None"] = ContextVar(
+    "current_query_counter", default=None
+)
+
+
+class QueryCounter:
+    """Count SQL statements sent through the engine.
+
+    A scoped counter only counts statements issued from the task that entered
+    it: tasks share the engine, but each carries its own context, so queries
+    of concurrent updates are not attributed to the profiled one.
+    """
+
+    def __init__(self, scoped: bool = False):
+        self.count = 0
+        self.scoped = scoped
+
+    def __call__(self, *args):
+        if not self.scoped or current_query_counter.get() is self:
+            self.count += 1
+
+    def __enter__(self):
+        if self.scoped:
+            self.token = current_query_counter.set(self)
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(engine, "before_cursor_execute", self)
+        if self.scoped:
+            current_query_counter.reset(self.token)
+
+
+class ProfileRun:
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.profiler = cProfile.Profile()
+        self.preempted = False
+
+    def preempt(self) -> None:
+        self.profiler.disable()
+        self.preempted = True
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Profile a sample of updates, or those for chosen handlers or users.
+
+    Each profiled update is written to ``directory`` as a pstats file named
+    after the handler, rating_id, SQL query count and the number of other
+    updates that overlapped it; only the newest ``max_dumps`` files are kept.
+    Feed them to snakeviz or flameprof for a flamegraph.
+
+    cProfile records every coroutine that runs on the thread while it is
+    enabled, so a dump tagged ``o3`` also holds frames of three other updates.
+    Only ``o0`` dumps show the handler alone; the query count is always scoped
+    to the profiled update. cProfile cannot be nested: a targeted update
+    preempts a sampled one, whose partial profile is dropped, and any other
+    update arriving during a profile is logged and skipped.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        callbacks: CallbackTable,
+        sample_rate: float = 0.0,
+        handlers: set[str] = frozenset(),
+        user_ids: set[int] = frozenset(),
+        max_dumps: int = 100,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.callbacks = callbacks
+        self.sample_rate = sample_rate
+        self.handlers = handlers
+        self.user_ids = user_ids
+        self.max_dumps = max_dumps
+        self.current: ProfileRun | None = None
+        self.in_flight = 0
+        self.started = 0
+
+    def handler_name(self, event, data) -> str:
+        if isinstance(event, CallbackQuery):
+            route = self.callbacks.lookup(event.data or "")
+            if route is not None:
+                return route[1].__name__
+        return data["handler"].callback.__name__
+
+    def profile_reason(self, event, handler_name: str) -> str | None:
+        if handler_name in self.handlers:
+            return TARGETED
+        if event.from_user and event.from_user.id in self.user_ids:
+            return TARGETED
+        if random.random() < self.sample_rate:
+            return SAMPLED
+        return None
+
+    async def __call__(self, handler, event, data):
+        self.in_flight += 1
+        self.started += 1
+        try:
+            return await self.handle(handler, event, data)
+        finally:
+            self.in_flight -= 1
+
+    async def handle(self, handler, event, data):
+        handler_name = self.handler_name(event, data)
+        reason = self.profile_reason(event, handler_name)
+        if reason is None:
+            return await handler(event, data)
+        if self.current is not None:
+            if reason == SAMPLED or self.current.reason == TARGETED:
+                logger.info(
+                    "Skipped profiling %s: another update is profiled", handler_name
+                )
+                return await handler(event, data)
+            logger.info("Dropped sampled profile in favour of %s", handler_name)
+            self.current.preempt()
+
+        run = ProfileRun(reason)
+        queries = QueryCounter(scoped=True)
+        already_running = self.in_flight - 1
+        started = self.started
+        rating_id = None
+        self.current = run
+        try:
+            state = data.get("state")
+            if state:
+                rating_id = (await state.get_data()).get("rating_id")
+            with queries:
+                run.profiler.enable()
+                try:
+                    return await handler(event, data)
+                finally:
+                    if not run.preempted:
+                        run.profiler.disable()
+        finally:
+            if self.current is run:
+                self.current = None
+            if not run.preempted:
+                overlapping = already_running + self.started - started
+                self.dump(
+                    run.profiler, handler_name, rating_id, queries.count, overlapping
+                )
+
+    def dump(self, profiler, handler_name, rating_id, query_count, overlapping) -> None:
+        name = (
+            f"{time.time_ns()}-{handler_name}-r{rating_id}"
+            f"-q{query_count}-o{overlapping}.prof"
+        )
+        profiler.dump_stats(self.directory / name)
+        dumps = sorted(self.directory.glob("*.prof"))
+        for path in dumps[: -self.max_dumps]:
+            path.unlink(missing_ok=True)
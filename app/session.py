@@ -1,15 +1,82 @@
+import os
+import time
+from functools import wraps
+
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from sqlalchemy.orm import scoped_session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///memory.db")
+SQL_ECHO = os.getenv("SQL_ECHO", "true") == "true"
+# Usecases block the event loop while SQLite waits for a lock, so the whole
+# retry window is kept to a few hundred milliseconds: far below the 30 s
+# long-polling interval, and short next to a Telegram API round-trip.
+BUSY_TIMEOUT_MS = 100
+BUSY_DEADLINE_S = 0.2
+BUSY_BACKOFF_S = 0.01
 
 
 class ORMModel(DeclarativeBase):
     __abstract__ = True
 
 
-engine = create_engine("sqlite:///memory.db", echo=True)
-db = scoped_session(sessionmaker(bind=engine))()
+def make_engine(url: str = DATABASE_URL):
+    engine = create_engine(url, echo=SQL_ECHO)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+
+engine = make_engine()
+db = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))()
 
 
 def init_db():
     ORMModel.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced
+    # after the database was first created.
+    for table in ORMModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def is_busy_error(exc: OperationalError) -> bool:
+    message = str(exc.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def retry_on_busy(func):
+    """Rerun a write usecase when SQLite reports SQLITE_BUSY.
+
+    The wrapped function must end with its only commit, so a failed attempt
+    leaves nothing behind after the rollback, and must not call other
+    decorated usecases. Cache and snapshot updates belong to the caller, after
+    the retried function returns. The sleeps block the event loop, so retries
+    stop once BUSY_DEADLINE_S has passed; a stalled write then holds up the
+    worker for at most BUSY_DEADLINE_S plus one BUSY_TIMEOUT_MS.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        deadline = time.monotonic() + BUSY_DEADLINE_S
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                db.rollback()
+                delay = BUSY_BACKOFF_S * 2**attempt
+                if not is_busy_error(exc) or time.monotonic() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    return wrapper
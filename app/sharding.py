@@ -0,0 +1,144 @@
+"""Run the bot as one front process and N worker processes.
+
+The front process long-polls Telegram and routes every update to a worker by
+``from_user.id``, so a user's FSM state always lives in the same worker. Each
+worker imports ``app.bot`` in a fresh interpreter and therefore gets its own
+engine and connection pool over the shared WAL-mode database.
+
+Usage: ``python -m app.sharding --workers 4``
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+from functools import partial
+
+from aiogram.dispatcher.dispatcher import DEFAULT_BACKOFF_CONFIG
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.utils.backoff import Backoff
+
+SHUTDOWN = None
+CONCURRENCY = 100
+POLLING_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+
+def user_id_of(update) -> int | None:
+    user = getattr(update.event, "from_user", None)
+    return user.id if user else None
+
+
+def shard_for(update, workers: int) -> int:
+    user_id = user_id_of(update)
+    if user_id is None:
+        return 0
+    return user_id % workers
+
+
+def run_worker(queue: mp.Queue, concurrency: int = CONCURRENCY) -> None:
+    """Feed queued updates to the dispatcher as concurrent tasks.
+
+    At most ``concurrency`` updates are in flight; updates from the same user
+    are chained so they are still handled in the order they arrived.
+    """
+    from aiogram.types import Update
+
+    from app.bot import bot, dp
+
+    async def handle(update, previous, limit):
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            await dp.feed_update(bot, update)
+        except Exception:
+            logger.exception("Failed to process update %d", update.update_id)
+        finally:
+            limit.release()
+
+    async def consume():
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(concurrency)
+        tails = {}
+
+        def forget(user_id, task):
+            if tails.get(user_id) is task:
+                del tails[user_id]
+
+        while True:
+            data = await loop.run_in_executor(None, queue.get)
+            if data is SHUTDOWN:
+                break
+            update = Update.model_validate(data, context={"bot": bot})
+            await limit.acquire()
+            user_id = user_id_of(update)
+            task = asyncio.create_task(handle(update, tails.get(user_id), limit))
+            tails[user_id] = task
+            task.add_done_callback(partial(forget, user_id))
+        if tails:
+            await asyncio.wait(list(tails.values()))
+        await bot.session.close()
+
+    asyncio.run(consume())
+
+
+async def poll(bot, queues: list[mp.Queue]) -> None:
+    backoff = Backoff(config=DEFAULT_BACKOFF_CONFIG)
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=POLLING_TIMEOUT,
+                request_timeout=int(bot.session.timeout + POLLING_TIMEOUT),
+            )
+        except (TelegramNetworkError, TelegramServerError) as exc:
+            logger.warning(
+                "Failed to fetch updates (%s), retrying in %.1f s",
+                exc,
+                backoff.next_delay,
+            )
+            await backoff.asleep()
+            continue
+        backoff.reset()
+        for update in updates:
+            shard = shard_for(update, len(queues))
+            queues[shard].put(update.model_dump(mode="json", exclude_none=True))
+            offset = update.update_id + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    args = parser.parse_args()
+
+    from app.bot import bot
+    from app.session import init_db
+
+    init_db()
+
+    ctx = mp.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(args.workers)]
+    workers = [
+        ctx.Process(target=run_worker, args=(queue, args.concurrency))
+        for queue in queues
+    ]
+    for worker in workers:
+        worker.start()
+
+    logger.info("Routing updates to %d workers", args.workers)
+    try:
+        asyncio.run(poll(bot, queues))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for queue in queues:
+            queue.put(SHUTDOWN)
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
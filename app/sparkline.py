@@ -0,0 +1,11 @@
+BARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: list[float]) -> str:
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high == low:
+        return BARS[len(BARS) // 2] * len(values)
+    scale = (len(BARS) - 1) / (high - low)
+    return "".join(BARS[round((value - low) * scale)] for value in values)
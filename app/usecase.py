@@ -1,20 +1,39 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import contains_eager, joinedload
+
+from app.cache import LRUCache
 from app.elo import ELOMatch
-from app.model import Game, Player, PlayerStatistics, Rating, User
-from app.session import db
+from app.leaderboard import leaderboard
+from app.model import Game, Player, PlayerStatistics, Rating, RatingHistory, User
+from app.session import db, retry_on_busy
 
+STATISTICS_CACHE_SIZE = 1024
 
-def find_or_create_user(telegram_id: int) -> User:
+# PlayerStatistics rows by player id; entries are dropped whenever a write
+# touches the player. The size bound also caps how many rows the cache keeps
+# alive in the session's identity map.
+statistics_cache = LRUCache(STATISTICS_CACHE_SIZE)
+
+
+def add_user_if_missing(telegram_id: int) -> User:
     user = db.query(User).filter(User.telegram_id == telegram_id).first()
     if not user:
         user = User(telegram_id=telegram_id)
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
     return user
 
 
+@retry_on_busy
+def find_or_create_user(telegram_id: int) -> User:
+    user = add_user_if_missing(telegram_id)
+    db.commit()
+    return user
+
+
+@retry_on_busy
 def create_rating_by_name(name: str, telegram_id: int) -> Rating | Exception:
-    user = find_or_create_user(telegram_id)
+    user = add_user_if_missing(telegram_id)
     existing_rating = db.query(Rating).filter_by(user_id=user.id, name=name).first()
     if existing_rating:
         return Exception("rating already exist")
@@ -22,7 +41,6 @@ def create_rating_by_name(name: str, telegram_id: int) -> Rating | Exception:
     rating = Rating(name=name, user_id=user.id)
     db.add(rating)
     db.commit()
-    db.refresh(rating)
     return rating
 
 
@@ -33,8 +51,19 @@ def get_user_ratings(telegram_id: int) -> list[Rating]:
 
 
 def delete_rating_by_id(rating_id: int) -> None | Exception:
+    exc = remove_rating(rating_id)
+    if exc is None:
+        statistics_cache.clear()
+        leaderboard.discard(rating_id)
+    return exc
+
+
+@retry_on_busy
+def remove_rating(rating_id: int) -> None | Exception:
     rating = db.query(Rating).filter_by(id=rating_id).first()
     if rating:
+        rating_players = select(Player.id).where(Player.rating_id == rating_id)
+        delete_rating_history(RatingHistory.player_id.in_(rating_players))
         db.delete(rating)
         db.commit()
         return
@@ -42,7 +71,7 @@ def delete_rating_by_id(rating_id: int) -> None | Exception:
 
 
 def get_rating_by_id(rating_id: int) -> Rating | Exception:
-    rating = db.query(Rating).filter_by(id=rating_id).first()
+    rating = db.get(Rating, rating_id)
     if rating:
         return rating
     return Exception("rating not found")
@@ -51,6 +80,14 @@ def get_rating_by_id(rating_id: int) -> Rating | Exception:
 def create_rating_participant_by_name(
     rating_id: int, participant_name: str
 ) -> Player | Exception:
+    participant = add_rating_participant(rating_id, participant_name)
+    if not isinstance(participant, Exception):
+        leaderboard.refresh(rating_id)
+    return participant
+
+
+@retry_on_busy
+def add_rating_participant(rating_id: int, participant_name: str) -> Player | Exception:
     rating = get_rating_by_id(rating_id)
     if isinstance(rating, Exception):
         return rating
@@ -69,8 +106,6 @@ def create_rating_participant(
     rating_id: int,
 ):
     new_statistics = PlayerStatistics()
-    db.add(new_statistics)
-    db.commit()
     new_participant = Player(
         name=player_name, rating_id=rating_id, statistics=new_statistics
     )
@@ -80,25 +115,76 @@ def create_rating_participant(
 
 
 def get_rating_participants(rating_id: int) -> list[Player]:
-    rating = get_rating_by_id(rating_id)
-    if isinstance(rating, Exception):
-        return []
-    return rating.players
+    return (
+        db.query(Player)
+        .options(joinedload(Player.statistics))
+        .filter(Player.rating_id == rating_id)
+        .order_by(Player.id)
+        .all()
+    )
 
 
 def get_participant_statistics(participant_id: int) -> PlayerStatistics | Exception:
-    participant = db.query(Player).filter_by(id=participant_id).first()
-    if participant:
-        return participant.statistics
+    stats = statistics_cache.get(participant_id)
+    if stats:
+        return stats
+    stats = (
+        db.query(PlayerStatistics)
+        .join(PlayerStatistics.player)
+        .options(contains_eager(PlayerStatistics.player))
+        .filter(Player.id == participant_id)
+        .first()
+    )
+    if stats:
+        statistics_cache.put(participant_id, stats)
+        return stats
     return Exception("participant not found")
 
 
+def get_participant_rating_history(participant_id: int, limit: int = 20) -> list[float]:
+    """Return the participant's latest rating values, oldest first."""
+    rows = (
+        db.query(RatingHistory.rating_value)
+        .filter(RatingHistory.player_id == participant_id)
+        .order_by(RatingHistory.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [rating_value for (rating_value,) in reversed(rows)]
+
+
+def record_rating_history(game_id: int, ratings: dict[int, float]) -> None:
+    """Store each player's rating after a game with a single INSERT."""
+    db.execute(
+        insert(RatingHistory),
+        [
+            {"player_id": player_id, "game_id": game_id, "rating_value": rating_value}
+            for player_id, rating_value in ratings.items()
+        ],
+    )
+
+
+def delete_rating_history(condition) -> None:
+    """Bulk-delete history rows without loading them into the session."""
+    db.execute(delete(RatingHistory).where(condition))
+
+
 def delete_rating_participant(rating_id: int, participant_id: int) -> None | Exception:
+    exc = remove_rating_participant(rating_id, participant_id)
+    if exc is None:
+        statistics_cache.pop(participant_id)
+        leaderboard.refresh(rating_id)
+    return exc
+
+
+@retry_on_busy
+def remove_rating_participant(rating_id: int, participant_id: int) -> None | Exception:
     rating = get_rating_by_id(rating_id)
     if isinstance(rating, Exception):
         return rating
-    participant = db.query(Player).filter_by(id=participant_id).first()
+    participant = db.get(Player, participant_id)
     if participant:
+        delete_rating_history(RatingHistory.player_id == participant_id)
         db.delete(participant)
         db.commit()
         return
@@ -107,17 +193,36 @@ def delete_rating_participant(rating_id: int, participant_id: int) -> None | Exc
 
 def create_game_with_rankings(
     participant_leaderboard: dict[int, int], rating_id: int
-) -> None:
+) -> None | Exception:
     """Create a game and update Elo ratings based on ranks."""
+    player_ids = record_game_with_rankings(participant_leaderboard, rating_id)
+    if isinstance(player_ids, Exception):
+        return player_ids
+    for player_id in player_ids:
+        statistics_cache.pop(player_id)
+    leaderboard.refresh(rating_id)
+
+
+@retry_on_busy
+def record_game_with_rankings(
+    participant_leaderboard: dict[int, int], rating_id: int
+) -> list[int] | Exception:
     rating = get_rating_by_id(rating_id)
     if isinstance(rating, Exception):
         return rating
 
+    participants = {
+        participant.id: participant
+        for participant in db.query(Player)
+        .options(joinedload(Player.statistics))
+        .filter(Player.id.in_(participant_leaderboard))
+    }
+
     elo_match = ELOMatch()
 
     for player_id, rank in participant_leaderboard.items():
-        participant = get_participant_by_id(player_id)
-        if isinstance(participant, Exception):
+        participant = participants.get(player_id)
+        if participant is None:
             continue
         elo_match.add_player(
             player_id=player_id, place=rank, elo=participant.statistics.rating_value
@@ -127,22 +232,24 @@ def create_game_with_rankings(
 
     new_game = Game(rating_id=rating_id)
     db.add(new_game)
-    db.commit()
 
     for player in elo_match.players:
-        participant = get_participant_by_id(player.player_id)
-        if isinstance(participant, Exception):
-            continue
+        participant = participants[player.player_id]
         participant.statistics.rating_value = player.elo_post
         participant.statistics.played_games += 1
         if player.place == 1:
             participant.statistics.wins += 1
         new_game.participants.append(participant)
-        db.commit()
+    db.flush()
+    record_rating_history(
+        new_game.id, {player.player_id: player.elo_post for player in elo_match.players}
+    )
+    db.commit()
+    return list(participants)
 
 
 def get_participant_by_id(player_id: int) -> Player | Exception:
-    participant = db.query(Player).filter_by(id=player_id).first()
+    participant = db.get(Player, player_id)
     if participant:
         return participant
     return Exception("participant not found")
@@ -0,0 +1,96 @@
+"""Compare callback routing cost: the old F.data filter chain vs CallbackTable.
+
+The old router is reproduced as the ordered list of magic filters the bot
+used to register, followed by the ``split("_")`` parsing its handlers did.
+The new one is ``CallbackTable.lookup`` followed by ``unpack``. Both are timed
+over the same mix of button taps with ``timeit``.
+
+Usage: ``python -m benchmarks.callbacks [--number 20000]``
+"""
+
+import argparse
+import timeit
+
+from aiogram import F
+from aiogram.types import CallbackQuery, User
+
+from app.callbacks import *
+
+USER = User(id=1752687551, is_bot=False, first_name="bench")
+
+OLD_ROUTES = [
+    (F.data == "create_rating", None),
+    (F.data == "load_rating", None),
+    (F.data == "delete_rating", None),
+    (F.data.startswith("select_rating_"), 1),
+    (F.data == "add_participant", None),
+    (F.data.startswith("show_participant_statistics_"), 1),
+    (F.data == "delete_participant", None),
+    (F.data == "add_game", None),
+    (F.data.startswith("select_player_"), 1),
+    (F.data == "start_ranking", None),
+    (F.data.startswith("rank_"), 1),
+    (F.data.startswith("assign_rank_"), 2),
+    (F.data == "finish_ranking", None),
+    (F.data == "return_to_start", None),
+    (F.data == "return_to_rating_menu", None),
+]
+
+TAPS = [
+    ("load_rating", LoadRating()),
+    ("select_rating_9223372036854775807", SelectRating(rating_id=2**63 - 1)),
+    ("show_participant_statistics_42", ShowParticipant(participant_id=42)),
+    ("select_player_42", SelectPlayer(player_id=42)),
+    ("rank_42", RankParticipant(participant_id=42)),
+    ("assign_rank_42_3", AssignRank(participant_id=42, rank=3)),
+    ("finish_ranking", FinishRanking()),
+    ("return_to_rating_menu", ReturnToRatingMenu()),
+]
+
+
+def callback_query(data: str) -> CallbackQuery:
+    return CallbackQuery(id="1", from_user=USER, chat_instance="bench", data=data)
+
+
+def old_route(callback: CallbackQuery):
+    for magic, arity in OLD_ROUTES:
+        if magic.resolve(callback):
+            if arity is None:
+                return ()
+            return tuple(int(part) for part in callback.data.split("_")[-arity:])
+
+
+def new_route(table: CallbackTable, callback: CallbackQuery):
+    factory, _ = table.lookup(callback.data)
+    if factory.model_fields:
+        return factory.unpack(callback.data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    table = CallbackTable()
+    for _, callback_data in TAPS:
+        table.route(type(callback_data))(None)
+
+    old_taps = [callback_query(data) for data, _ in TAPS]
+    new_taps = [callback_query(callback_data.pack()) for _, callback_data in TAPS]
+    longest = max(len(callback.data) for callback in new_taps)
+
+    old = timeit.timeit(
+        lambda: [old_route(callback) for callback in old_taps], number=args.number
+    )
+    new = timeit.timeit(
+        lambda: [new_route(table, callback) for callback in new_taps],
+        number=args.number,
+    )
+    taps = args.number * len(TAPS)
+    print(f"F.data chain:  {old / taps * 1e6:6.2f} us/tap")
+    print(f"CallbackTable: {new / taps * 1e6:6.2f} us/tap")
+    print(f"longest payload: {longest} bytes")
+
+
+if __name__ == "__main__":
+    main()
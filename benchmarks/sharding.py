@@ -0,0 +1,199 @@
+"""Measure update throughput of the sharded bot for 1, 2 and 4 workers.
+
+Every user owns a seeded rating and records games through the same button
+flow as the bot's menus: select the rating, pick two players, rank them and
+finish. The taps are fed through ``app.sharding.run_worker`` against a fresh
+SQLite database, so workers contend for the write lock on every finished
+game. The bot talks to a stub session that answers every API call after a
+fixed delay, standing in for the Telegram round-trip.
+
+Usage: ``python -m benchmarks.sharding [--users 200] [--games 3]``
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+from aiogram.client.session.base import BaseSession
+
+os.environ.setdefault("BOT_TOKEN", "42:BENCHMARK")
+os.environ.setdefault("SQL_ECHO", "false")
+
+API_LATENCY_S = 0.02
+PLAYERS_PER_RATING = 4
+
+
+class StubSession(BaseSession):
+    async def make_request(self, bot, method, timeout=None):
+        await asyncio.sleep(API_LATENCY_S)
+        return True
+
+    async def stream_content(
+        self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True
+    ):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def bench_worker(queue, ready) -> None:
+    from app.bot import bot
+    from app.sharding import run_worker
+
+    logging.getLogger("aiogram").setLevel(logging.WARNING)
+    bot.session = StubSession()
+    ready.set()
+    run_worker(queue)
+
+
+def seed(users: int) -> dict[int, tuple[int, list[int]]]:
+    """Give every user a rating with a few players; map users to their ids."""
+    from sqlalchemy.orm import Session
+
+    from app.model import Player, PlayerStatistics, Rating, User
+    from app.session import ORMModel, make_engine
+
+    engine = make_engine(os.environ["DATABASE_URL"])
+    ORMModel.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        ratings = {}
+        for user_id in range(1, users + 1):
+            rating = Rating(name="bench", user=User(telegram_id=user_id))
+            rating.players = [
+                Player(name=f"p{index}", statistics=PlayerStatistics())
+                for index in range(PLAYERS_PER_RATING)
+            ]
+            session.add(rating)
+            ratings[user_id] = rating
+        session.commit()
+        seeded = {
+            user_id: (rating.id, [player.id for player in rating.players])
+            for user_id, rating in ratings.items()
+        }
+    engine.dispose()
+    return seeded
+
+
+def game_flow(rating_id: int, players: list[int], game: int) -> list[str]:
+    from app.callbacks import (
+        AddGame,
+        AssignRank,
+        FinishRanking,
+        SelectPlayer,
+        SelectRating,
+        StartRanking,
+    )
+
+    winner = players[game % len(players)]
+    loser = players[(game + 1) % len(players)]
+    return [
+        SelectRating(rating_id=rating_id).pack(),
+        AddGame().pack(),
+        SelectPlayer(player_id=winner).pack(),
+        SelectPlayer(player_id=loser).pack(),
+        StartRanking().pack(),
+        AssignRank(participant_id=winner, rank=1).pack(),
+        AssignRank(participant_id=loser, rank=2).pack(),
+        FinishRanking().pack(),
+    ]
+
+
+def make_updates(seeded: dict[int, tuple[int, list[int]]], games: int) -> list[dict]:
+    """Interleave every user's game flows tap by tap."""
+    flows = [
+        (user_id, game_flow(rating_id, players, game))
+        for game in range(games)
+        for user_id, (rating_id, players) in seeded.items()
+    ]
+    updates = []
+    for step in range(len(flows[0][1])):
+        for user_id, flow in flows:
+            update_id = len(updates) + 1
+            user = {"id": user_id, "is_bot": False, "first_name": "bench"}
+            updates.append(
+                {
+                    "update_id": update_id,
+                    "callback_query": {
+                        "id": str(update_id),
+                        "from": user,
+                        "chat_instance": "bench",
+                        "data": flow[step],
+                        "message": {
+                            "message_id": 1,
+                            "date": 0,
+                            "chat": {"id": user_id, "type": "private"},
+                            "text": "bench",
+                        },
+                    },
+                }
+            )
+    return updates
+
+
+def count_games() -> int:
+    from sqlalchemy import func, select
+
+    from app.model import Game
+    from app.session import make_engine
+
+    engine = make_engine(os.environ["DATABASE_URL"])
+    with engine.connect() as connection:
+        games = connection.scalar(select(func.count(Game.id)))
+    engine.dispose()
+    return games
+
+
+def run(workers: int, updates: list[dict]) -> float:
+    from aiogram.types import Update
+
+    from app.sharding import SHUTDOWN, shard_for
+
+    ctx = mp.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(workers)]
+    ready = [ctx.Event() for _ in range(workers)]
+    processes = [
+        ctx.Process(target=bench_worker, args=(queue, event))
+        for queue, event in zip(queues, ready)
+    ]
+    for process in processes:
+        process.start()
+    for event in ready:
+        event.wait()
+
+    started = time.perf_counter()
+    for data in updates:
+        queues[shard_for(Update.model_validate(data), workers)].put(data)
+    for queue in queues:
+        queue.put(SHUTDOWN)
+    for process in processes:
+        process.join()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU(s), {args.users} users x {args.games} games")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ["DATABASE_URL"] = f"sqlite:///{directory}/bench.db"
+            updates = make_updates(seed(args.users), args.games)
+            elapsed = run(workers, updates)
+            games = count_games()
+        print(
+            f"{workers} worker(s): {len(updates) / elapsed:8.1f} updates/s, "
+            f"{games / elapsed:6.1f} games/s, {games} games recorded"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["SQL_ECHO"] = "false"
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+
+import pytest  # noqa: E402
+
+from app.leaderboard import leaderboard  # noqa: E402
+from app.session import ORMModel, db, engine  # noqa: E402
+from app.usecase import statistics_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database():
+    ORMModel.metadata.create_all(bind=engine)
+    yield db
+    db.rollback()
+    db.expunge_all()
+    statistics_cache.clear()
+    leaderboard.ratings.clear()
+    ORMModel.metadata.drop_all(bind=engine)
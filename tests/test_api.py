@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api import create_app
+from app.profiling import QueryCounter
+from app.usecase import (
+    create_game_with_rankings,
+    create_rating_by_name,
+    create_rating_participant_by_name,
+)
+
+
+@pytest.fixture
+def duel():
+    rating = create_rating_by_name("duel", telegram_id=1)
+    ann = create_rating_participant_by_name(rating.id, "ann")
+    bob = create_rating_participant_by_name(rating.id, "bob")
+    return rating, ann, bob
+
+
+def serve(scenario):
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            return await scenario(client)
+
+    return asyncio.run(run())
+
+
+def test_leaderboard_conditional_requests(duel):
+    rating, ann, bob = duel
+    url = f"/ratings/{rating.id}/leaderboard"
+
+    async def scenario(client):
+        response = await client.get(url)
+        assert response.status == 200
+        etag = response.headers["ETag"]
+        body = await response.json()
+        assert [player["name"] for player in body["players"]] == ["ann", "bob"]
+
+        with QueryCounter() as queries:
+            response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status == 304
+        assert response.headers["ETag"] == etag
+        assert queries.count == 0
+
+        create_game_with_rankings({bob.id: 1, ann.id: 2}, rating.id)
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert response.headers["ETag"] != etag
+        body = await response.json()
+        assert [player["name"] for player in body["players"]] == ["bob", "ann"]
+
+    serve(scenario)
+
+
+def test_unknown_rating_is_not_found():
+    async def scenario(client):
+        response = await client.get("/ratings/999/leaderboard")
+        assert response.status == 404
+
+    serve(scenario)
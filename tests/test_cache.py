@@ -0,0 +1,14 @@
+from app.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    cache.get(1)
+    cache.put(3, "c")
+
+    assert 1 in cache
+    assert 2 not in cache
+    assert 3 in cache
+    assert len(cache) == 2
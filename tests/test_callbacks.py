@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.callbacks import (
+    OUTDATED_MENU,
+    AssignRank,
+    CallbackTable,
+    ExportFormat,
+    ExportRating,
+    LoadRating,
+    SelectRating,
+    ShowParticipant,
+)
+
+MAX_ID = 2**63 - 1
+
+
+class FakeCallback:
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append(text)
+
+
+@pytest.fixture
+def table():
+    table = CallbackTable()
+    calls = []
+
+    @table.route(LoadRating)
+    async def load_rating(callback, state):
+        calls.append(("load", None))
+
+    @table.route(SelectRating)
+    async def select_rating(callback, state, callback_data):
+        calls.append(("select", callback_data))
+
+    return table, calls
+
+
+def dispatch(table, data) -> FakeCallback:
+    callback = FakeCallback(data)
+    asyncio.run(table.dispatch(callback, state=None))
+    return callback
+
+
+def test_dispatch_routes_by_prefix(table):
+    table, calls = table
+    dispatch(table, LoadRating().pack())
+    callback = dispatch(table, SelectRating(rating_id=7).pack())
+
+    assert calls == [("load", None), ("select", SelectRating(rating_id=7))]
+    assert callback.answers == []
+
+
+@pytest.mark.parametrize("data", ["zz:1", "", "sr:abc", "sr"])
+def test_dispatch_answers_outdated_menu(table, data):
+    table, calls = table
+    callback = dispatch(table, data)
+
+    assert calls == []
+    assert callback.answers == [OUTDATED_MENU]
+
+
+def test_route_rejects_duplicate_prefix(table):
+    table, _ = table
+    with pytest.raises(ValueError):
+        table.route(LoadRating)
+
+
+@pytest.mark.parametrize(
+    "callback_data",
+    [
+        SelectRating(rating_id=MAX_ID),
+        ShowParticipant(participant_id=MAX_ID),
+        AssignRank(participant_id=MAX_ID, rank=MAX_ID),
+        ExportRating(fmt=ExportFormat.jsonl),
+    ],
+)
+def test_packed_data_fits_telegram_limit(callback_data):
+    assert len(callback_data.pack().encode()) <= 64
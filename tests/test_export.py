@@ -0,0 +1,85 @@
+import asyncio
+import csv
+import io
+import json
+
+from sqlalchemy import event
+
+from app.callbacks import ExportFormat
+from app.export import write_rating_export
+from app.session import engine
+from app.usecase import (
+    create_game_with_rankings,
+    create_rating_by_name,
+    create_rating_participant_by_name,
+)
+
+
+def make_rating():
+    rating = create_rating_by_name("league", telegram_id=1)
+    ann = create_rating_participant_by_name(rating.id, "ann")
+    bob = create_rating_participant_by_name(rating.id, "bob")
+    create_game_with_rankings({ann.id: 1, bob.id: 2}, rating.id)
+    return rating, ann, bob
+
+
+def export(rating_id: int, fmt: ExportFormat) -> str:
+    file = io.StringIO()
+    assert asyncio.run(write_rating_export(rating_id, fmt, file)) is None
+    return file.getvalue()
+
+
+def test_jsonl_export():
+    rating, ann, bob = make_rating()
+
+    rows = [
+        json.loads(line) for line in export(rating.id, ExportFormat.jsonl).splitlines()
+    ]
+
+    assert [row["type"] for row in rows] == ["player", "player", "game", "game"]
+    assert rows[0]["name"] == "ann"
+    assert {row["player_id"]: row["rating_after"] for row in rows[2:]} == {
+        ann.id: 1516.0,
+        bob.id: 1484.0,
+    }
+
+
+def test_csv_export():
+    rating, _, _ = make_rating()
+
+    rows = list(csv.DictReader(io.StringIO(export(rating.id, ExportFormat.csv))))
+
+    assert len(rows) == 4
+    assert rows[2]["type"] == "game"
+
+
+def test_export_unknown_rating():
+    result = asyncio.run(write_rating_export(404, ExportFormat.csv, io.StringIO()))
+
+    assert isinstance(result, Exception)
+
+
+def test_export_uses_indexes():
+    rating, _, _ = make_rating()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        export(rating.id, ExportFormat.csv)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as connection:
+        steps = [
+            row[-1]
+            for statement, parameters in statements
+            for row in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        ]
+
+    assert not [step for step in steps if step.startswith("SCAN")]
+    assert not [step for step in steps if "TEMP B-TREE" in step]
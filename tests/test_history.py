@@ -0,0 +1,81 @@
+import pytest
+
+from app.model import RatingHistory
+from app.sparkline import BARS, sparkline
+from app.usecase import (
+    create_game_with_rankings,
+    create_rating_by_name,
+    create_rating_participant_by_name,
+    delete_rating_by_id,
+    delete_rating_participant,
+    get_participant_rating_history,
+)
+
+
+@pytest.fixture
+def duel():
+    rating = create_rating_by_name("duel", telegram_id=1)
+    ann = create_rating_participant_by_name(rating.id, "ann")
+    bob = create_rating_participant_by_name(rating.id, "bob")
+    return rating, ann, bob
+
+
+def history_rows(database, player_id=None) -> int:
+    query = database.query(RatingHistory)
+    if player_id is not None:
+        query = query.filter_by(player_id=player_id)
+    return query.count()
+
+
+def test_history_keeps_latest_games_oldest_first(database, duel):
+    rating, ann, bob = duel
+    for _ in range(25):
+        create_game_with_rankings({ann.id: 1, bob.id: 2}, rating.id)
+
+    values = [
+        rating_value
+        for (rating_value,) in database.query(RatingHistory.rating_value)
+        .filter_by(player_id=ann.id)
+        .order_by(RatingHistory.id)
+    ]
+    history = get_participant_rating_history(ann.id)
+
+    assert len(values) == 25
+    assert history == values[-20:]
+    assert history == sorted(history)
+
+
+def test_deleting_participant_removes_history(database, duel):
+    rating, ann, bob = duel
+    create_game_with_rankings({ann.id: 1, bob.id: 2}, rating.id)
+
+    delete_rating_participant(rating.id, ann.id)
+
+    assert history_rows(database, ann.id) == 0
+    assert history_rows(database, bob.id) == 1
+
+
+def test_deleting_rating_removes_history(database, duel):
+    rating, ann, bob = duel
+    other = create_rating_by_name("other", telegram_id=1)
+    cid = create_rating_participant_by_name(other.id, "cid")
+    dan = create_rating_participant_by_name(other.id, "dan")
+    create_game_with_rankings({ann.id: 1, bob.id: 2}, rating.id)
+    create_game_with_rankings({cid.id: 1, dan.id: 2}, other.id)
+
+    delete_rating_by_id(rating.id)
+
+    assert history_rows(database) == 2
+    assert history_rows(database, cid.id) == 1
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([], ""),
+        ([1500.0, 1500.0, 1500.0], BARS[4] * 3),
+        ([1500.0, 1516.0, 1484.0, 1500.0], BARS[4] + BARS[7] + BARS[0] + BARS[4]),
+    ],
+)
+def test_sparkline(values, expected):
+    assert sparkline(values) == expected
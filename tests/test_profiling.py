@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from app.callbacks import CallbackTable
+from app.profiling import ProfilerMiddleware, QueryCounter
+from app.session import db
+
+
+def make_update(handler):
+    event = SimpleNamespace(from_user=None)
+    data = {"handler": SimpleNamespace(callback=handler)}
+    return event, data
+
+
+async def run_queries(count):
+    for _ in range(count):
+        db.execute(text("SELECT 1"))
+        await asyncio.sleep(0)
+
+
+def dump_names(directory) -> list[str]:
+    return sorted(path.name.split("-", 1)[1] for path in directory.glob("*.prof"))
+
+
+def test_scoped_counter_ignores_other_tasks():
+    async def profiled():
+        with QueryCounter(scoped=True) as scoped:
+            await run_queries(2)
+        return scoped.count
+
+    async def scenario():
+        with QueryCounter() as everything:
+            other = asyncio.create_task(run_queries(3))
+            count = await profiled()
+            await other
+        return everything.count, count
+
+    assert asyncio.run(scenario()) == (5, 2)
+
+
+def test_dump_counts_only_profiled_queries(tmp_path):
+    middleware = ProfilerMiddleware(tmp_path, CallbackTable(), handlers={"profiled"})
+
+    async def profiled(event, data):
+        await run_queries(1)
+
+    async def other(event, data):
+        await run_queries(3)
+
+    async def scenario():
+        await asyncio.gather(
+            middleware(profiled, *make_update(profiled)),
+            middleware(other, *make_update(other)),
+        )
+
+    asyncio.run(scenario())
+
+    assert dump_names(tmp_path) == ["profiled-rNone-q1-o1.prof"]
+
+
+def test_targeted_update_preempts_sampled_one(tmp_path):
+    middleware = ProfilerMiddleware(
+        tmp_path, CallbackTable(), sample_rate=1.0, handlers={"targeted"}
+    )
+    release = asyncio.Event()
+
+    async def sampled(event, data):
+        await release.wait()
+
+    async def targeted(event, data):
+        await release.wait()
+
+    async def scenario():
+        updates = []
+        for handler in (sampled, targeted, sampled):
+            updates.append(
+                asyncio.create_task(middleware(handler, *make_update(handler)))
+            )
+            await asyncio.sleep(0)
+        assert middleware.current.reason == "targeted"
+        release.set()
+        await asyncio.gather(*updates)
+
+    asyncio.run(scenario())
+
+    assert dump_names(tmp_path) == ["targeted-rNone-q0-o2.prof"]
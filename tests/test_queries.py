@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.bot import add_game, finish_ranking, show_participant_statistics
+from app.callbacks import ShowParticipant
+from app.profiling import QueryCounter
+from app.usecase import (
+    create_game_with_rankings,
+    create_rating_by_name,
+    create_rating_participant_by_name,
+    delete_rating_participant,
+    get_participant_statistics,
+    statistics_cache,
+)
+
+
+class FakeMessage:
+    async def edit_text(self, text, reply_markup=None):
+        self.text = text
+
+
+class FakeCallback:
+    def __init__(self):
+        self.message = FakeMessage()
+
+
+def make_state(**data) -> FSMContext:
+    state = FSMContext(
+        storage=MemoryStorage(), key=StorageKey(bot_id=42, chat_id=1, user_id=1)
+    )
+    asyncio.run(state.set_data(data))
+    return state
+
+
+@pytest.fixture
+def league():
+    rating = create_rating_by_name("league", telegram_id=1)
+    players = [
+        create_rating_participant_by_name(rating.id, name)
+        for name in ("ann", "bob", "cid", "dan")
+    ]
+    return rating, players
+
+
+def count_queries(handler, *args) -> int:
+    with QueryCounter() as queries:
+        asyncio.run(handler(*args))
+    return queries.count
+
+
+def test_profile_queries(league):
+    rating, players = league
+    state = make_state(rating_id=rating.id)
+    callback_data = ShowParticipant(participant_id=players[0].id)
+
+    cold = count_queries(
+        show_participant_statistics, FakeCallback(), state, callback_data
+    )
+    warm = count_queries(
+        show_participant_statistics, FakeCallback(), state, callback_data
+    )
+
+    # statistics with the player joined, then the rating history
+    assert cold == 2
+    # statistics come from the cache
+    assert warm == 1
+
+
+def test_participant_list_queries(league):
+    rating, _ = league
+    callback = FakeCallback()
+
+    assert count_queries(add_game, callback, make_state(rating_id=rating.id)) == 1
+    assert callback.message.text == "Select players for this game:"
+
+
+@pytest.mark.parametrize("participants", [2, 4])
+def test_game_creation_queries(league, participants):
+    rating, players = league
+    leaderboard = {player.id: place for place, player in enumerate(players, 1)}
+    leaderboard = dict(list(leaderboard.items())[:participants])
+    state = make_state(rating_id=rating.id, participant_leaderboard=leaderboard)
+
+    # participants with statistics, statistics updates batched for the winner
+    # and the rest, game, association and history inserts, then the rating
+    # menu keyboard; none of it grows with the number of participants
+    assert count_queries(finish_ranking, FakeCallback(), state) == 7
+
+
+def test_cache_invalidated_after_game(league):
+    rating, players = league
+    winner, loser = players[:2]
+    get_participant_statistics(winner.id)
+    assert winner.id in statistics_cache
+
+    create_game_with_rankings({winner.id: 1, loser.id: 2}, rating.id)
+
+    assert winner.id not in statistics_cache
+    stats = get_participant_statistics(winner.id)
+    assert stats.played_games == 1
+    assert stats.wins == 1
+
+
+def test_cache_invalidated_after_delete(league):
+    rating, players = league
+    get_participant_statistics(players[0].id)
+    assert players[0].id in statistics_cache
+
+    delete_rating_participant(rating.id, players[0].id)
+
+    assert players[0].id not in statistics_cache
+    assert isinstance(get_participant_statistics(players[0].id), Exception)